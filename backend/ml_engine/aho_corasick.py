@@ -0,0 +1,120 @@
+"""
+Aho-Corasick prefilter for bug pattern scanning
+Finds every line containing a pattern needle in one pass over the file bytes
+"""
+
+import numpy as np
+from collections import deque
+from typing import Sequence, Tuple
+
+try:
+    from numba import njit
+    JIT_AVAILABLE = True
+except ImportError:
+    JIT_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Fallback decorator that leaves the kernel as plain Python"""
+        def decorate(func):
+            return func
+        return decorate
+
+
+def build_automaton(needle_groups: Sequence[Sequence[bytes]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build a caseless Aho-Corasick DFA over lowercase needles
+
+    Args:
+        needle_groups: needle_groups[i] holds the needles of pattern i
+
+    Returns:
+        (table, out_mask) where table[state, byte] is the next state and
+        out_mask[state] has bit i set when a needle of pattern i ends there
+    """
+    goto = [[-1] * 256]
+    out = [0]
+
+    for pattern_id, needles in enumerate(needle_groups):
+        for needle in needles:
+            state = 0
+            for byte in needle:
+                if goto[state][byte] == -1:
+                    goto[state][byte] = len(goto)
+                    goto.append([-1] * 256)
+                    out.append(0)
+                state = goto[state][byte]
+            out[state] |= 1 << pattern_id
+
+    # Breadth-first pass folds the failure links into a full transition table
+    fail = [0] * len(goto)
+    queue = deque()
+    for byte in range(256):
+        if goto[0][byte] == -1:
+            goto[0][byte] = 0
+        else:
+            queue.append(goto[0][byte])
+
+    while queue:
+        state = queue.popleft()
+        out[state] |= out[fail[state]]
+        for byte in range(256):
+            nxt = goto[state][byte]
+            if nxt == -1:
+                goto[state][byte] = goto[fail[state]][byte]
+            else:
+                fail[nxt] = goto[fail[state]][byte]
+                queue.append(nxt)
+
+    table = np.array(goto, dtype=np.int32)
+    # Uppercase ASCII behaves exactly like its lowercase letter
+    upper = np.arange(ord('A'), ord('Z') + 1)
+    table[:, upper] = table[:, upper + 32]
+
+    return table, np.array(out, dtype=np.int64)
+
+
+@njit(cache=True)
+def scan_lines(buf, table, out_mask):
+    """
+    Scan a uint8 buffer and report the lines that contain any needle
+
+    Returns:
+        (line_nos, line_starts, masks) with one entry per hit line, where
+        masks[k] ORs the pattern bits of every needle found on that line
+    """
+    size = buf.shape[0]
+    max_lines = 1
+    for pos in range(size):
+        if buf[pos] == 10:
+            max_lines += 1
+
+    line_nos = np.empty(max_lines, dtype=np.int64)
+    line_starts = np.empty(max_lines, dtype=np.int64)
+    masks = np.empty(max_lines, dtype=np.int64)
+
+    count = 0
+    state = 0
+    line_no = 1
+    line_start = 0
+    line_mask = 0
+    for pos in range(size):
+        byte = buf[pos]
+        state = table[state, byte]
+        line_mask |= out_mask[state]
+        if byte == 10:
+            if line_mask:
+                line_nos[count] = line_no
+                line_starts[count] = line_start
+                masks[count] = line_mask
+                count += 1
+            line_no += 1
+            line_start = pos + 1
+            line_mask = 0
+
+    if line_mask:
+        line_nos[count] = line_no
+        line_starts[count] = line_start
+        masks[count] = line_mask
+        count += 1
+
+    return line_nos[:count], line_starts[:count], masks[:count]
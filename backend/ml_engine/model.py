@@ -4,80 +4,260 @@ Implements a machine learning model for detecting bugs in code
 """
 
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.feature_extraction.text import TfidfVectorizer
 import pickle
 import re
-from typing import List, Dict, Tuple
+import string
+import sys
+from collections import Counter
+from collections.abc import Sequence
+from typing import IO, List, Dict, Tuple, Union
+
+try:
+    # RE2 matches in linear time, so the fused alternation can't backtrack
+    import re2
+    re2.Options  # google-re2; other bindings have no Latin-1 mode
+except (ImportError, AttributeError):
+    re2 = None
+
+SEVERITY_LEVELS = ('critical', 'high', 'medium', 'low')
+SMALL_FILE_BYTES = 2048  # Clean files below this skip feature extraction
+
+_TEXT_WORD_RE = re.compile(r'\w+')
+_CONSTANT_CHARS = string.ascii_uppercase + '_'
+
+def _compile_re(pattern: bytes):
+    """Compile a fused byte pattern with the stdlib engine"""
+    return re.compile(pattern)
+
+def _compile_re2(pattern: bytes):
+    """
+    Compile a fused byte pattern with google-re2
+    Latin-1 mode reads the subject one byte per character instead of
+    decoding it as UTF-8
+    """
+    options = re2.Options()
+    options.encoding = re2.Options.Encoding.LATIN1
+    return re2.compile(pattern, options)
+
+_compile_fused = _compile_re2 if re2 is not None else _compile_re
+
+def tokenize(code: str) -> List[str]:
+    """
+    Split code into word tokens
+    Feature extraction uses this split; the TF-IDF vectorizer gets the same
+    regex as its token_pattern
+    """
+    return _TEXT_WORD_RE.findall(code)
+
+class PatternHits(Sequence):
+    """
+    Pattern matches stored as parallel lists
+    Bug dicts are only built when the hits are read
+    """
+    
+    __slots__ = ('line_nos', 'pattern_ids', 'codes', '_patterns')
+    
+    def __init__(self, patterns: List[Tuple]):
+        self.line_nos: List[int] = []
+        self.pattern_ids: List[int] = []
+        self.codes: List[str] = []
+        self._patterns = patterns
+    
+    def add(self, line_no: int, pattern_id: int, code: str):
+        """Record one pattern match"""
+        self.line_nos.append(line_no)
+        self.pattern_ids.append(pattern_id)
+        self.codes.append(code)
+    
+    def _bug(self, index: int) -> Dict:
+        _, severity, message = self._patterns[self.pattern_ids[index]]
+        return {
+            'line': self.line_nos[index],
+            'severity': severity,
+            'message': message,
+            'code': self.codes[index],
+            'type': 'pattern'
+        }
+    
+    def __len__(self) -> int:
+        return len(self.line_nos)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._bug(i) for i in range(len(self))[index]]
+        return self._bug(range(len(self))[index])
+    
+    def __iter__(self):
+        return (self._bug(i) for i in range(len(self)))
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (PatternHits, list)):
+            return list(self) == list(other)
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"PatternHits({list(self)!r})"
 
 class BugDetectionModel:
     """
     Machine Learning model for detecting potential bugs in code
     """
     
+    # Pattern tables are compiled once and shared by every instance
+    _patterns_loaded = False
+    bug_patterns: List[Dict] = []
+    _compiled_patterns: List[Tuple] = []
+    _byte_patterns: List[bytes] = []
+    _severity_ids = np.zeros(0, dtype=np.intp)
+    _needles: List[Tuple[bytes, ...]] = []
+    _text_needles: List[Tuple[str, ...]] = []
+    _fused_cache: Dict[Tuple[int, ...], object] = {}
+    _text_fused_cache: Dict[Tuple[int, ...], re.Pattern] = {}
+    
     def __init__(self):
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=20,
-            random_state=42
-        )
-        self.vectorizer = TfidfVectorizer(
-            max_features=1000,
-            ngram_range=(1, 3),
-            token_pattern=r'\b\w+\b'
+        # sklearn takes about a second to import and predict() never uses it,
+        # so the estimators are built on first access
+        self._model = None
+        self._vectorizer = None
+        self._ensure_patterns()
+    
+    @property
+    def model(self):
+        """RandomForest classifier, created on first use"""
+        if self._model is None:
+            from sklearn.ensemble import RandomForestClassifier
+            self._model = RandomForestClassifier(
+                n_estimators=100,
+                max_depth=20,
+                random_state=42
+            )
+        return self._model
+    
+    @model.setter
+    def model(self, value):
+        self._model = value
+    
+    @property
+    def vectorizer(self):
+        """TF-IDF vectorizer, created on first use"""
+        if self._vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._vectorizer = TfidfVectorizer(
+                max_features=1000,
+                ngram_range=(1, 3),
+                # A pattern string rather than tokenize keeps the pickle free
+                # of references to this module, which loads as 'model' or
+                # 'ml_engine.model' depending on the entry point
+                token_pattern=_TEXT_WORD_RE.pattern,
+                dtype=np.float32
+            )
+        return self._vectorizer
+    
+    @vectorizer.setter
+    def vectorizer(self, value):
+        self._vectorizer = value
+    
+    @staticmethod
+    def _ensure_patterns():
+        """
+        Load and compile the bug patterns on first use
+        The tables are set on BugDetectionModel itself, not on a subclass,
+        so every variant shares one copy whichever is built first
+        """
+        cls = BugDetectionModel
+        if cls._patterns_loaded:
+            return
+        cls.bug_patterns = cls._load_bug_patterns()
+        # (regex, severity, message) per pattern; hit lines are confirmed with
+        # the regex and the interned strings are shared by every bug dict
+        cls._compiled_patterns = [
+            (re.compile(p['pattern'], re.IGNORECASE),
+             sys.intern(p['severity']),
+             sys.intern(p['message']))
+            for p in cls.bug_patterns
+        ]
+        # Byte patterns only ever see ASCII input; \s also lists the \x1c-\x1f
+        # separators str \s matches, and \x0b, which RE2's \s leaves out
+        cls._byte_patterns = [
+            p['pattern'].replace(r'\s', r'[\s\x0b\x1c-\x1f]').encode()
+            for p in cls.bug_patterns
+        ]
+        # Index into SEVERITY_LEVELS per pattern, for vectorized tallies
+        cls._severity_ids = np.array(
+            [SEVERITY_LEVELS.index(p['severity']) for p in cls.bug_patterns],
+            dtype=np.intp
         )
-        self.bug_patterns = self._load_bug_patterns()
+        # Lowercase literals each pattern needs, checked before any regex runs
+        cls._needles = [
+            tuple(needle.encode() for needle in p['needles'])
+            for p in cls.bug_patterns
+        ]
+        cls._text_needles = [tuple(p['needles']) for p in cls.bug_patterns]
+        cls._fused_cache = {}
+        cls._text_fused_cache = {}
+        cls._patterns_loaded = True
         
-    def _load_bug_patterns(self) -> List[Dict[str, str]]:
+    @staticmethod
+    def _load_bug_patterns() -> List[Dict]:
         """Load common bug patterns for detection"""
         return [
             {
                 'pattern': r'==\s*None',
+                'needles': ('none',),
                 'severity': 'medium',
                 'message': 'Use "is None" instead of "== None"'
             },
             {
                 'pattern': r'except\s*:',
+                'needles': ('except',),
                 'severity': 'high',
                 'message': 'Bare except clause - specify exception type'
             },
             {
                 'pattern': r'eval\s*\(',
+                'needles': ('eval',),
                 'severity': 'critical',
                 'message': 'Use of eval() is dangerous - security risk'
             },
             {
                 'pattern': r'exec\s*\(',
+                'needles': ('exec',),
                 'severity': 'critical',
                 'message': 'Use of exec() is dangerous - security risk'
             },
             {
                 'pattern': r'var\s+\w+\s*=',
+                'needles': ('var',),
                 'severity': 'low',
                 'message': 'Use let or const instead of var in JavaScript'
             },
             {
                 'pattern': r'console\.log\(',
+                'needles': ('console.log(',),
                 'severity': 'low',
                 'message': 'Remove console.log before production'
             },
             {
                 'pattern': r'TODO|FIXME|HACK',
+                'needles': ('todo', 'fixme', 'hack'),
                 'severity': 'medium',
                 'message': 'Unresolved TODO/FIXME comment'
             },
             {
                 'pattern': r'password\s*=\s*["\']',
+                'needles': ('password',),
                 'severity': 'critical',
                 'message': 'Hardcoded password detected - security risk'
             },
             {
                 'pattern': r'api[_-]?key\s*=\s*["\']',
+                'needles': ('api',),
                 'severity': 'critical',
                 'message': 'Hardcoded API key detected - security risk'
             },
             {
                 'pattern': r'\.innerHTML\s*=',
+                'needles': ('.innerhtml',),
                 'severity': 'high',
                 'message': 'Potential XSS vulnerability with innerHTML'
             }
@@ -85,39 +265,126 @@ class BugDetectionModel:
     
     def extract_features(self, code: str) -> np.ndarray:
         """Extract features from code for ML model"""
+        return np.array(self._feature_values(code)).reshape(1, -1)
+    
+    def _feature_values(self, code: str) -> List[int]:
+        """Compute the feature vector for decoded code"""
+        # One tokenizer pass; every keyword feature is read from the tally
+        counts = Counter(tokenize(code))
+        newlines = code.count('\n')
+        
         features = []
         
         # Code complexity metrics
-        features.append(len(code.split('\n')))  # Line count
-        features.append(code.count('if'))  # Conditional complexity
-        features.append(code.count('for') + code.count('while'))  # Loop complexity
-        features.append(code.count('try'))  # Exception handling
-        features.append(code.count('def') + code.count('function'))  # Function count
-        features.append(len(re.findall(r'\b[A-Z_]+\b', code)))  # Constants
-        features.append(code.count('import') + code.count('require'))  # Dependencies
+        features.append(newlines + 1)  # Line count
+        features.append(counts['if'] + counts['elif'])  # Conditional complexity
+        features.append(counts['for'] + counts['while'])  # Loop complexity
+        features.append(counts['try'])  # Exception handling
+        features.append(counts['def'] + counts['function'])  # Function count
+        features.append(sum(
+            n for token, n in counts.items() if not token.strip(_CONSTANT_CHARS)
+        ))  # Constants
+        features.append(counts['import'] + counts['require'])  # Dependencies
         
         # Code smell indicators
         features.append(1 if len(code) > 1000 else 0)  # Long file
-        features.append(1 if code.count('\n') > 300 else 0)  # Too many lines
-        features.append(code.count('# TODO') + code.count('// TODO'))  # TODOs
+        features.append(1 if newlines > 300 else 0)  # Too many lines
+        features.append(counts['TODO'])  # TODOs
         
-        return np.array(features).reshape(1, -1)
+        return features
+    
+    def _fused_for(self, active: Tuple[int, ...]):
+        """Return one alternation byte regex over the given pattern indices"""
+        fused = self._fused_cache.get(active)
+        if fused is None:
+            # Inline flags work the same under re and RE2
+            fused = _compile_fused(
+                b'(?im)' + b'|'.join(
+                    b'(?:' + self._byte_patterns[i] + b')' for i in active
+                )
+            )
+            self._fused_cache[active] = fused
+        return fused
+    
+    def _text_fused_for(self, active: Tuple[int, ...]) -> re.Pattern:
+        """Return one alternation str regex over the given pattern indices"""
+        fused = self._text_fused_cache.get(active)
+        if fused is None:
+            fused = re.compile(
+                '|'.join(f"(?:{self.bug_patterns[i]['pattern']})" for i in active),
+                re.IGNORECASE | re.MULTILINE
+            )
+            self._text_fused_cache[active] = fused
+        return fused
+    
+    def _match_line(self, line_no: int, line: Union[str, bytes], pattern_ids, bugs: PatternHits):
+        """Record a hit for every given pattern that matches a single line"""
+        if isinstance(line, bytes):
+            line = line.decode('ascii')
+        compiled = self._compiled_patterns
+        code = None
+        for i in pattern_ids:
+            if compiled[i][0].search(line):
+                if code is None:
+                    code = line.strip()
+                bugs.add(line_no, i, code)
     
     def detect_pattern_bugs(self, code: str) -> List[Dict]:
         """Detect bugs using regex patterns"""
-        bugs = []
-        lines = code.split('\n')
+        return list(self._detect_text(code))
+    
+    def _detect_text(self, code: str) -> PatternHits:
+        """Detect bugs in decoded code, on the bytes when it is ASCII"""
+        if code.isascii():
+            return self._scan_ascii(code.encode('ascii'))
+        return self._scan_text(code)
+    
+    def _scan_ascii(self, data: bytes) -> PatternHits:
+        """Detect bugs in ASCII code with the fused byte regex"""
+        # On ASCII, bytes.lower() folds case the same way str.casefold() does
+        return self._scan(data, data.lower(), self._needles, self._fused_for)
+    
+    def _scan_text(self, code: str) -> PatternHits:
+        """
+        Detect bugs in non-ASCII code with the fused str regex
+        Unicode \\s, \\w and case folding (e.g. 'ſ' for 's') need str patterns
+        """
+        return self._scan(code, code.casefold(), self._text_needles, self._text_fused_for)
+    
+    def _scan(self, code: Union[str, bytes], folded, needle_table, fused_for) -> PatternHits:
+        """Run the fused regex over the patterns whose needles appear in folded"""
+        bugs = PatternHits(self._compiled_patterns)
         
-        for i, line in enumerate(lines, 1):
-            for pattern_info in self.bug_patterns:
-                if re.search(pattern_info['pattern'], line, re.IGNORECASE):
-                    bugs.append({
-                        'line': i,
-                        'severity': pattern_info['severity'],
-                        'message': pattern_info['message'],
-                        'code': line.strip(),
-                        'type': 'pattern'
-                    })
+        # Substring checks are far cheaper than the regex engine; most files
+        # contain none or only a few of the needles
+        active = tuple(
+            i for i, needles in enumerate(needle_table)
+            if any(needle in folded for needle in needles)
+        )
+        if not active:
+            return bugs
+        fused = fused_for(active)
+        newline = b'\n' if isinstance(code, bytes) else '\n'
+        
+        line_no = 1
+        counted = 0  # newlines before this offset are already in line_no
+        
+        # Scan the whole file once; only lines with a hit are split out
+        match = fused.search(code)
+        while match:
+            start = match.start()
+            line_no += code.count(newline, counted, start)
+            line_start = code.rfind(newline, 0, start) + 1
+            line_end = code.find(newline, start)
+            if line_end == -1:
+                line_end = len(code)
+            
+            # Alternation matches don't overlap (and \s can cross a newline),
+            # so confirm each pattern on the hit line
+            self._match_line(line_no, code[line_start:line_end], active, bugs)
+            
+            counted = line_end
+            match = fused.search(code, line_end + 1)
         
         return bugs
     
@@ -126,15 +393,46 @@ class BugDetectionModel:
         Predict if code contains bugs
         Returns detection results with confidence score
         """
-        # Pattern-based detection
-        pattern_bugs = self.detect_pattern_bugs(code)
+        # Compare the UTF-8 size, so small files are cut off as in predict_bytes;
+        # surrogatepass keeps lone surrogates (e.g. from json.loads) encodable
+        size = len(code) if code.isascii() else len(code.encode('utf-8', 'surrogatepass'))
+        results = self._predict(self._detect_text(code), size, code)
+        results['bugs_found'] = list(results['bugs_found'])
+        return results
+    
+    def predict_bytes(self, data: bytes) -> Dict:
+        """
+        Predict if UTF-8 encoded code contains bugs
+        ASCII files are scanned as bytes; others are decoded and scanned as str.
+        bugs_found is a PatternHits sequence whose dicts are built on access
+        """
+        if data.isascii():
+            return self._predict(self._scan_ascii(data), len(data), data)
+        code = data.decode('utf-8', 'replace')
+        return self._predict(self._scan_text(code), len(data), code)
+    
+    def _predict(self, pattern_bugs: PatternHits, size: int, code: Union[str, bytes]) -> Dict:
+        """Build the detection results; ASCII bytes are decoded only for features"""
+        # Most files in a repo are small and clean; report them as clean
+        # without computing features
+        if not pattern_bugs and size < SMALL_FILE_BYTES:
+            return {
+                'has_bugs': False,
+                'confidence': 0.0,
+                'bugs_found': pattern_bugs,
+                'total_issues': 0,
+                'severity_breakdown': self._calculate_severity(pattern_bugs)
+            }
+        
+        if isinstance(code, bytes):
+            code = code.decode('ascii')
         
         # ML-based detection (simulated for MVP)
-        features = self.extract_features(code)
+        features = self._feature_values(code)
         
         # Calculate bug probability based on features
-        complexity_score = features[0][1] + features[0][2]  # if + loops
-        line_count = features[0][0]
+        complexity_score = features[1] + features[2]  # if + loops
+        line_count = features[0]
         
         # Simple heuristic for MVP (would be replaced with trained model)
         bug_probability = min(0.95, (complexity_score * 0.1 + line_count * 0.001))
@@ -150,22 +448,33 @@ class BugDetectionModel:
     
     def _calculate_severity(self, bugs: List[Dict]) -> Dict[str, int]:
         """Calculate severity breakdown of detected bugs"""
-        severity_count = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
-        for bug in bugs:
-            severity_count[bug['severity']] += 1
-        return severity_count
+        if isinstance(bugs, PatternHits):
+            # Tally straight from the pattern ids without building the dicts
+            counts = np.bincount(
+                self._severity_ids[bugs.pattern_ids], minlength=len(SEVERITY_LEVELS)
+            ).tolist()
+            return dict(zip(SEVERITY_LEVELS, counts))
+        counts = Counter(bug['severity'] for bug in bugs)
+        return {severity: counts[severity] for severity in SEVERITY_LEVELS}
     
-    def save_model(self, filepath: str):
-        """Save trained model to disk"""
+    def save_model(self, filepath: Union[str, IO[bytes]]):
+        """Save trained model to disk or to an open binary file"""
+        state = {
+            'model': self.model,
+            'vectorizer': self.vectorizer
+        }
+        if hasattr(filepath, 'write'):
+            pickle.dump(state, filepath)
+            return
         with open(filepath, 'wb') as f:
-            pickle.dump({
-                'model': self.model,
-                'vectorizer': self.vectorizer
-            }, f)
-    
-    def load_model(self, filepath: str):
-        """Load trained model from disk"""
-        with open(filepath, 'rb') as f:
-            data = pickle.load(f)
-            self.model = data['model']
-            self.vectorizer = data['vectorizer']
+            pickle.dump(state, f)
+    
+    def load_model(self, filepath: Union[str, IO[bytes]]):
+        """Load trained model from disk or from an open binary file"""
+        if hasattr(filepath, 'read'):
+            data = pickle.load(filepath)
+        else:
+            with open(filepath, 'rb') as f:
+                data = pickle.load(f)
+        self.model = data['model']
+        self.vectorizer = data['vectorizer']
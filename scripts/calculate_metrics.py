@@ -4,7 +4,37 @@ Calculate code quality metrics
 """
 
 import os
-from pathlib import Path
+
+from source_files import find_code_files, read_source
+
+# Bytes str.strip() treats as whitespace in ASCII text
+_SPACE_BYTES = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+
+def count_line_types(data: bytes):
+    """
+    Count total, blank and comment lines
+    bytes.splitlines() ends lines at \\n, \\r\\n or a lone \\r, as text-mode
+    reads do, and UTF-8 files get the same counts as the old readlines()
+    loop. Other encodings, which that loop skipped, are counted too; their
+    lines are stripped of ASCII whitespace only
+    """
+    lines = data.splitlines()
+    blank_lines = comment_lines = 0
+    for line in lines:
+        stripped = line.strip(_SPACE_BYTES)
+        if stripped[:1] >= b'\x80':
+            # The line may open with Unicode whitespace such as U+00A0, which
+            # only str.strip() removes
+            try:
+                stripped = line.decode('utf-8').strip().encode('utf-8')
+            except UnicodeDecodeError:
+                pass
+        if not stripped:
+            blank_lines += 1
+        elif stripped.startswith((b'#', b'//')):
+            comment_lines += 1
+    
+    return len(lines), blank_lines, comment_lines
 
 def calculate_metrics():
     """Calculate basic code quality metrics"""
@@ -17,24 +47,21 @@ def calculate_metrics():
         'blank_lines': 0
     }
     
-    code_files = list(Path('.').rglob('*.py')) + list(Path('.').rglob('*.js'))
-    code_files = [f for f in code_files if 'node_modules' not in str(f)]
+    code_files = find_code_files('.', ('.py', '.js'))
     
     for file_path in code_files:
+        # Counted on bytes, so files that aren't UTF-8 are counted too
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                metrics['total_files'] += 1
-                metrics['total_lines'] += len(lines)
-                
-                for line in lines:
-                    stripped = line.strip()
-                    if not stripped:
-                        metrics['blank_lines'] += 1
-                    elif stripped.startswith('#') or stripped.startswith('//'):
-                        metrics['comment_lines'] += 1
-        except:
-            pass
+            data = read_source(file_path)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {file_path}: {e}")
+            continue
+        
+        total_lines, blank_lines, comment_lines = count_line_types(data)
+        metrics['total_files'] += 1
+        metrics['total_lines'] += total_lines
+        metrics['blank_lines'] += blank_lines
+        metrics['comment_lines'] += comment_lines
     
     if metrics['total_files'] > 0:
         metrics['avg_file_length'] = metrics['total_lines'] / metrics['total_files']
@@ -11,7 +11,7 @@ command -v node >/dev/null 2>&1 || { echo "Node.js is required but not installed
 
 # Install Python dependencies
 echo "📦 Installing Python dependencies..."
-pip install -q numpy scikit-learn
+pip install -q numpy scikit-learn pytest pytest-xdist
 
 # Install Node.js dependencies
 echo "📦 Installing Node.js dependencies..."
@@ -25,7 +25,7 @@ python backend/ml_engine/train.py
 
 # Run tests
 echo "🧪 Running tests..."
-pytest tests/ -q || echo "⚠️  Some tests failed"
+pytest tests/ -q -n auto --dist=loadgroup || echo "⚠️  Some tests failed"
 
 # Start API server
 echo "🌐 Starting API server..."
@@ -7,17 +7,138 @@ Scans all code files and generates comprehensive report
 import os
 import sys
 import json
-from pathlib import Path
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from ml_engine.model import BugDetectionModel
+from source_files import find_code_files, read_source
+from ml_engine.model import BugDetectionModel, PatternHits
+from ml_engine.aho_corasick import JIT_AVAILABLE, build_automaton, scan_lines
+
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+class HyperscanBugDetectionModel(BugDetectionModel):
+    """
+    BugDetectionModel that finds hit lines with a Hyperscan database
+    Hyperscan matches all patterns in one SIMD pass over the file bytes;
+    non-ASCII files take the base class's str scan
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._database = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+        self._database.compile(
+            expressions=self._byte_patterns,
+            ids=list(range(len(self.bug_patterns))),
+            elements=len(self.bug_patterns),
+            flags=[hyperscan.HS_FLAG_CASELESS] * len(self.bug_patterns)
+        )
+    
+    def _scan_ascii(self, data: bytes) -> PatternHits:
+        """Detect bugs in ASCII code using the Hyperscan database"""
+        match_ends = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            match_ends.append(end)
+        
+        self._database.scan(data, match_event_handler=on_match)
+        
+        bugs = PatternHits(self._compiled_patterns)
+        line_no = 1
+        counted = 0  # newlines before this offset are already in line_no
+        last_line_start = -1
+        
+        # Hyperscan reports every match end, so each real hit marks its own
+        # line; the regexes confirm which patterns match that line
+        for end in sorted(match_ends):
+            line_start = data.rfind(b'\n', 0, end - 1) + 1
+            if line_start == last_line_start:
+                continue
+            line_no += data.count(b'\n', counted, line_start)
+            line_end = data.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = len(data)
+            self._match_line(
+                line_no, data[line_start:line_end], range(len(self.bug_patterns)), bugs
+            )
+            counted = line_start
+            last_line_start = line_start
+        
+        return bugs
+
+class AhoCorasickBugDetectionModel(BugDetectionModel):
+    """
+    BugDetectionModel that finds hit lines with a JIT-compiled Aho-Corasick scan
+    The automaton matches the pattern needles, so only lines holding one are
+    handed to the regexes; non-ASCII files take the base class's str scan
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self._table, self._out_mask = build_automaton(self._needles)
+    
+    def _scan_ascii(self, data: bytes) -> PatternHits:
+        """Detect bugs in ASCII code on the lines flagged by the automaton"""
+        line_nos, line_starts, masks = scan_lines(
+            np.frombuffer(data, dtype=np.uint8), self._table, self._out_mask
+        )
+        
+        bugs = PatternHits(self._compiled_patterns)
+        for line_no, line_start, mask in zip(line_nos.tolist(), line_starts.tolist(), masks.tolist()):
+            line_end = data.find(b'\n', line_start)
+            if line_end == -1:
+                line_end = len(data)
+            pattern_ids = [i for i in range(len(self.bug_patterns)) if mask >> i & 1]
+            self._match_line(line_no, data[line_start:line_end], pattern_ids, bugs)
+        
+        return bugs
+
+def create_model() -> BugDetectionModel:
+    """Pick the fastest pattern scanner available in this environment"""
+    if hyperscan:
+        return HyperscanBugDetectionModel()
+    if JIT_AVAILABLE:
+        return AhoCorasickBugDetectionModel()
+    return BugDetectionModel()
+
+@lru_cache(maxsize=None)
+def _worker_model() -> BugDetectionModel:
+    """Model shared by every file scanned in this process"""
+    return create_model()
+
+def _scan_one(file_path):
+    """
+    Scan a single file in a worker process
+    Returns (results, message); only the summary fields cross the process
+    boundary, not the per-bug details
+    """
+    try:
+        data = read_source(file_path)
+    except (OSError, ValueError) as e:
+        return None, f"Skipping {file_path}: {e}"
+    
+    try:
+        results = _worker_model().predict_bytes(data)
+    except Exception as e:
+        return None, f"Error scanning {file_path}: {e}"
+    
+    return {
+        'has_bugs': results['has_bugs'],
+        'total_issues': results['total_issues'],
+        'confidence': results['confidence'],
+        'severity_breakdown': results['severity_breakdown']
+    }, None
 
 def scan_project(root_dir='.', extensions=['.py', '.js', '.ts', '.jsx', '.tsx']):
     """Scan all code files in project"""
     
-    model = BugDetectionModel()
     all_results = {
         'total_files': 0,
         'files_with_bugs': 0,
@@ -32,28 +153,23 @@ def scan_project(root_dir='.', extensions=['.py', '.js', '.ts', '.jsx', '.tsx'])
         'confidence': 0.0
     }
     
-    # Find all code files
-    code_files = []
-    for ext in extensions:
-        code_files.extend(Path(root_dir).rglob(f'*{ext}'))
-    
-    # Filter out node_modules, venv, etc.
-    code_files = [
-        f for f in code_files 
-        if 'node_modules' not in str(f) 
-        and 'venv' not in str(f)
-        and '.git' not in str(f)
-        and 'dist' not in str(f)
-    ]
+    # Find all code files, skipping node_modules, venv, etc.
+    code_files = find_code_files(root_dir, extensions)
     
     print(f"Scanning {len(code_files)} files...")
     
-    for file_path in code_files:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                code = f.read()
-            
-            results = model.predict(code)
+    # Forked workers inherit a model built here; under spawn or forkserver
+    # each worker builds its own on first use, so skip the parent build
+    if multiprocessing.get_start_method() == 'fork':
+        _worker_model()
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        scanned = executor.map(_scan_one, code_files, chunksize=16)
+        
+        for file_path, (results, message) in zip(code_files, scanned):
+            if message is not None:
+                print(message)
+                continue
             
             all_results['total_files'] += 1
             if results['has_bugs']:
@@ -71,9 +187,6 @@ def scan_project(root_dir='.', extensions=['.py', '.js', '.ts', '.jsx', '.tsx'])
                 'total_issues': results['total_issues'],
                 'confidence': results['confidence']
             })
-            
-        except Exception as e:
-            print(f"Error scanning {file_path}: {e}")
     
     # Calculate average confidence
     if all_results['total_files'] > 0:
@@ -106,7 +219,8 @@ def scan_project(root_dir='.', extensions=['.py', '.js', '.ts', '.jsx', '.tsx'])
 def generate_html_report(results):
     """Generate HTML report of scan results"""
     
-    html = f"""
+    # Collect the pieces and write them once; += on a str is quadratic
+    parts = [f"""
     <!DOCTYPE html>
     <html>
     <head>
@@ -149,27 +263,27 @@ def generate_html_report(results):
                 <th>Issues</th>
                 <th>Confidence</th>
             </tr>
-    """
+    """]
     
     for file_info in results['files']:
         status = "⚠️ Issues" if file_info['has_bugs'] else "✅ Clean"
-        html += f"""
+        parts.append(f"""
             <tr>
                 <td>{file_info['path']}</td>
                 <td>{status}</td>
                 <td>{file_info['total_issues']}</td>
                 <td>{file_info['confidence']:.1%}</td>
             </tr>
-        """
+        """)
     
-    html += """
+    parts.append("""
         </table>
     </body>
     </html>
-    """
+    """)
     
     with open('scan_report.html', 'w') as f:
-        f.write(html)
+        f.writelines(parts)
 
 if __name__ == "__main__":
     scan_project()
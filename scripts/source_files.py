@@ -0,0 +1,46 @@
+"""
+Helpers for reading project source files
+Shared by the scanning and metrics scripts
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, List
+
+EXCLUDE_DIRS = {'node_modules', 'venv', '.venv', '.git', 'dist'}
+MAX_FILE_BYTES = 2 * 1024 * 1024  # Minified bundles and artifacts are skipped
+SNIFF_BYTES = 4096  # A NUL byte in this prefix marks a binary file
+
+def read_source(file_path) -> bytes:
+    """
+    Read a source file as bytes
+    Raises ValueError for files that are too large or look binary
+    """
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size > MAX_FILE_BYTES:
+            raise ValueError(f"file is {size} bytes, over the {MAX_FILE_BYTES} byte limit")
+
+        if b'\0' in f.read(SNIFF_BYTES):
+            raise ValueError("file looks binary")
+
+        # Re-read from the start rather than joining head + rest, which
+        # would copy the whole file a second time
+        f.seek(0)
+        return f.read()
+
+def find_code_files(root_dir, extensions: Iterable[str]) -> List[Path]:
+    """
+    List files under root_dir with one of the given extensions
+    Walks the tree once and never descends into EXCLUDE_DIRS
+    """
+    extensions = tuple(extensions)
+    code_files = []
+
+    for dirpath, dirs, files in os.walk(root_dir):
+        dirs[:] = sorted(d for d in dirs if d not in EXCLUDE_DIRS)
+        code_files.extend(
+            Path(dirpath) / name for name in sorted(files) if name.endswith(extensions)
+        )
+
+    return code_files
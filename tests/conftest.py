@@ -2,6 +2,7 @@
 PyTest configuration and fixtures
 """
 
+import functools
 import pytest
 import sys
 import os
@@ -9,6 +10,22 @@ import os
 # Add backend to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
+from ml_engine.model import BugDetectionModel
+
+_MODELS = {}
+
+@functools.lru_cache(maxsize=256)
+def cached_predict(model_id, code):
+    """Run predict once per model and snippet for the whole session"""
+    return _MODELS[model_id].predict(code)
+
+@pytest.fixture(scope="session")
+def predict():
+    """Fixture providing a memoized predict on a session-wide model"""
+    model = BugDetectionModel()
+    _MODELS[id(model)] = model
+    return functools.partial(cached_predict, id(model))
+
 @pytest.fixture(scope="session")
 def sample_buggy_code():
     """Fixture providing sample buggy code"""
@@ -0,0 +1,47 @@
+"""
+Unit tests for the Aho-Corasick prefilter
+"""
+
+import sys
+import os
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
+
+from ml_engine.aho_corasick import build_automaton, scan_lines
+
+def _scan(needle_groups, text):
+    table, out_mask = build_automaton(needle_groups)
+    buf = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+    line_nos, line_starts, masks = scan_lines(buf, table, out_mask)
+    return line_nos.tolist(), line_starts.tolist(), masks.tolist()
+
+class TestAhoCorasick:
+    """Test suite for the needle automaton"""
+
+    def test_reports_hit_lines(self):
+        """Test that only lines containing a needle are reported"""
+        text = 'x = 1\nresult = eval(data)\ny = 2\n# TODO'
+
+        line_nos, line_starts, masks = _scan([(b'eval',), (b'todo',)], text)
+        assert line_nos == [2, 4]
+        assert line_starts == [6, text.index('# TODO')]
+        assert masks == [0b01, 0b10]
+
+    def test_caseless_matching(self):
+        """Test that uppercase input matches lowercase needles"""
+        line_nos, _, masks = _scan([(b'todo', b'fixme')], 'FixMe later')
+        assert line_nos == [1]
+        assert masks == [1]
+
+    def test_overlapping_needles(self):
+        """Test needles that share a suffix or overlap in the text"""
+        line_nos, _, masks = _scan([(b'hehe',), (b'ehe',), (b'he',)], 'hehehe')
+        assert line_nos == [1]
+        assert masks == [0b111]
+
+    def test_no_hits(self):
+        """Test that clean and empty input report nothing"""
+        assert _scan([(b'eval',)], 'const x = 10;\n')[0] == []
+        assert _scan([(b'eval',)], '')[0] == []
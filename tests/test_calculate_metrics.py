@@ -0,0 +1,64 @@
+"""
+Tests for the code metrics script
+"""
+
+import io
+import pytest
+import sys
+import os
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from calculate_metrics import count_line_types
+
+def _count_with_readlines(data):
+    """The original per-line loop over a text-mode file"""
+    lines = io.TextIOWrapper(io.BytesIO(data), encoding='utf-8').readlines()
+    blank_lines = comment_lines = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            blank_lines += 1
+        elif stripped.startswith('#') or stripped.startswith('//'):
+            comment_lines += 1
+    return len(lines), blank_lines, comment_lines
+
+@pytest.mark.parametrize("data", [
+    b'',
+    b'\n',
+    b'x = 1',
+    b'x = 1\ny = 2',
+    b'x = 1\ny = 2\n',
+    b'\n\n\n',
+    b'  \n\t\n \x0b\x0c \nx\n',
+    b'\x1c\x1f\n',
+    b'# comment\n    # indented\nx = 1  # trailing\n',
+    b'// comment\n\t// indented\n/ not a comment\n/* block */\n',
+    b'#',
+    b'//',
+    b'x\n/',
+    b'x\n  /',
+    b'\xc3\xa9 = 1\n# caf\xc3\xa9\n',
+    b'a\rb\rc',
+    b'x = 1\r\n\r\n# c\r\n',
+    b'\r\r\n\n\r',
+    b'x\r',
+    '\xa0\n\u3000\n\xa0# note\n\u3000// note\nx\xa0\n'.encode('utf-8'),
+    '\u2028\n\x85# note\n\u3000x\n'.encode('utf-8'),
+], ids=[
+    'empty', 'lone_newline', 'no_trailing_newline', 'two_lines_no_trailing_newline',
+    'trailing_newline', 'blank_only', 'whitespace_only_lines', 'separator_whitespace',
+    'hash_comments', 'slash_comments', 'lone_hash', 'lone_double_slash',
+    'lone_slash_at_eof', 'indented_slash_at_eof', 'non_ascii',
+    'cr_only', 'crlf', 'mixed_line_endings', 'trailing_cr',
+    'unicode_spaces', 'unicode_separators',
+])
+def test_count_line_types_matches_readlines(data):
+    """Test that the NumPy counts match the readlines()/strip() loop"""
+    assert count_line_types(data) == _count_with_readlines(data)
+
+def test_count_line_types_non_utf8():
+    """Test that Latin-1 files are counted, with only ASCII whitespace stripped"""
+    data = '\xa0\n\xa0# note\n# caf\xe9\n\xe9\n'.encode('latin-1')
+    assert count_line_types(data) == (4, 0, 1)
@@ -2,6 +2,8 @@
 Unit tests for bug detection model
 """
 
+import io
+import json
 import pytest
 import sys
 import os
@@ -9,108 +11,117 @@ import os
 # Add backend to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'backend'))
 
-from ml_engine.model import BugDetectionModel
+from ml_engine import model as model_module
+from ml_engine.model import BugDetectionModel, PatternHits, tokenize
 
-class TestBugDetectionModel:
-    """Test suite for BugDetectionModel"""
-    
-    @pytest.fixture
-    def model(self):
-        """Create model instance for testing"""
-        return BugDetectionModel()
+# Keep this module on one xdist worker so the module-scoped model is built once
+pytestmark = [pytest.mark.xdist_group("model")]
+
+# Code snippets are built once at import, not on every test call
+_CODE_CLEAN = '''
+import os
+
+def safe_function(value):
+    """A safe, well-written function"""
+    if value is None:
+        return None
     
-    def test_model_initialization(self, model):
-        """Test model initializes correctly"""
-        assert model is not None
-        assert model.model is not None
-        assert model.vectorizer is not None
-        assert len(model.bug_patterns) > 0
+    try:
+        result = process(value)
+    except ValueError as e:
+        logger.error(f"Processing error: {e}")
+        return None
     
-    def test_detect_hardcoded_password(self, model):
-        """Test detection of hardcoded passwords"""
-        code = '''
+    return result
+'''
+
+_CODE_COMPLEX = '''
+def complex_function():
+    if condition1:
+        for i in range(10):
+            if condition2:
+                try:
+                    process()
+                except Exception:
+                    pass
+'''
+
+_CODE_SMALL_CLEAN = '\n'.join(f'if x{i}: y = {i}' for i in range(10))
+
+_CODE_PASSWORD = '''
 def login():
     password = "hardcoded123"
     return authenticate(password)
-        '''
-        
-        results = model.predict(code)
-        assert results['has_bugs'] == True
-        assert results['total_issues'] > 0
-        
-        # Check if password issue was detected
-        bugs = results['bugs_found']
-        password_bugs = [b for b in bugs if 'password' in b['message'].lower()]
-        assert len(password_bugs) > 0
-        assert password_bugs[0]['severity'] == 'critical'
-    
-    def test_detect_bare_except(self, model):
-        """Test detection of bare except clauses"""
-        code = '''
+'''
+
+_CODE_BARE_EXCEPT = '''
 try:
     risky_operation()
 except:
     pass
-        '''
-        
-        results = model.predict(code)
-        assert results['has_bugs'] == True
-        
-        bugs = results['bugs_found']
-        except_bugs = [b for b in bugs if 'except' in b['message'].lower()]
-        assert len(except_bugs) > 0
-        assert except_bugs[0]['severity'] == 'high'
-    
-    def test_detect_eval_usage(self, model):
-        """Test detection of dangerous eval() usage"""
-        code = '''
+'''
+
+_CODE_EVAL = '''
 user_input = get_input()
 result = eval(user_input)
-        '''
-        
-        results = model.predict(code)
-        assert results['has_bugs'] == True
-        
-        bugs = results['bugs_found']
-        eval_bugs = [b for b in bugs if 'eval' in b['message'].lower()]
-        assert len(eval_bugs) > 0
-        assert eval_bugs[0]['severity'] == 'critical'
-    
-    def test_detect_api_key(self, model):
-        """Test detection of hardcoded API keys"""
-        code = '''
+'''
+
+_CODE_API_KEY = '''
 api_key = "sk-1234567890abcdef"
 client = APIClient(api_key)
-        '''
+'''
+
+_CODE_CONSOLE_LOG = '''
+function debug() {
+    console.log("Debug info");
+    return true;
+}
+'''
+
+_CODE_TODO = '''
+def incomplete():
+    # TODO: implement this
+    pass
+'''
+
+@pytest.fixture(scope="module")
+def model():
+    """Create one model instance shared by every test in this module"""
+    return BugDetectionModel()
+
+class TestBugDetectionModel:
+    """Test suite for BugDetectionModel"""
+    
+    def test_model_initialization(self, model):
+        """Test model initializes correctly"""
+        assert model is not None
+        assert model.model is not None
+        assert model.vectorizer is not None
+        assert len(model.bug_patterns) > 0
+    
+    def test_patterns_shared_between_instances(self, model):
+        """Test compiled patterns are built once and reused"""
+        other = BugDetectionModel()
+        assert other._compiled_patterns is model._compiled_patterns
+    
+    def test_patterns_shared_with_subclass_built_first(self, monkeypatch):
+        """Test that a subclass built first doesn't keep its own pattern tables"""
+        monkeypatch.setattr(BugDetectionModel, '_patterns_loaded', False)
         
-        results = model.predict(code)
-        assert results['has_bugs'] == True
+        class Subclass(BugDetectionModel):
+            pass
         
-        bugs = results['bugs_found']
-        api_bugs = [b for b in bugs if 'api' in b['message'].lower()]
-        assert len(api_bugs) > 0
-        assert api_bugs[0]['severity'] == 'critical'
+        sub = Subclass()
+        base = BugDetectionModel()
+        assert 'bug_patterns' not in vars(Subclass)
+        assert base._compiled_patterns is sub._compiled_patterns
+        assert base._fused_cache is sub._fused_cache
     
-    def test_clean_code_no_bugs(self, model):
+    def test_clean_code_no_bugs(self, predict):
         """Test that clean code passes without issues"""
-        code = '''
-import os
-
-def safe_function(value):
-    """A safe, well-written function"""
-    if value is None:
-        return None
-    
-    try:
-        result = process(value)
-    except ValueError as e:
-        logger.error(f"Processing error: {e}")
-        return None
-    
-    return result
-        '''
+        code = _CODE_CLEAN
         
-        results = model.predict(code)
+        results = predict(code)
         # Clean code might still have low confidence bugs, but should have no critical/high
         critical_bugs = [b for b in results['bugs_found'] if b['severity'] == 'critical']
         high_bugs = [b for b in results['bugs_found'] if b['severity'] == 'high']
@@ -118,18 +129,16 @@ def safe_function(value):
         assert len(critical_bugs) == 0
         assert len(high_bugs) == 0
     
+    def test_small_clean_file_short_circuit(self, predict):
+        """Test that small files without pattern hits are reported clean"""
+        results = predict(_CODE_SMALL_CLEAN)
+        assert results['has_bugs'] == False
+        assert results['confidence'] == 0.0
+        assert results['total_issues'] == 0
+    
     def test_feature_extraction(self, model):
         """Test feature extraction from code"""
-        code = '''
-def complex_function():
-    if condition1:
-        for i in range(10):
-            if condition2:
-                try:
-                    process()
-                except Exception:
-                    pass
-        '''
+        code = _CODE_COMPLEX
         
         features = model.extract_features(code)
         assert features is not None
@@ -141,6 +150,45 @@ def complex_function():
         assert features[0][2] > 0  # Has loops
         assert features[0][3] > 0  # Has try blocks
     
+    def test_predict_bytes_matches_predict(self, model):
+        """Test that scanning the UTF-8 buffer gives the same results"""
+        code = 'var café = "x";\npassword = "secret"  # TODO'
+        
+        assert model.predict_bytes(code.encode('utf-8')) == model.predict(code)
+        assert model.predict(code)['total_issues'] == 3
+    
+    def test_lone_surrogate_input(self, model):
+        """Test that strs that aren't valid UTF-8 are still scanned"""
+        code = 'result = eval(data)  # \ud800'
+        
+        assert model.predict(code)['total_issues'] == 1
+        assert model.predict(code)['bugs_found'][0]['code'] == code
+        assert [b['code'] for b in model.detect_pattern_bugs(code)] == [code]
+        assert model.extract_features(code).shape == (1, 10)
+    
+    def test_unit_separator_whitespace(self, predict):
+        """Test that the byte scan treats \\x1c-\\x1f as whitespace, like str"""
+        for sep in '\x1c\x1d\x1e\x1f':
+            assert predict(f'password{sep}= "x"')['total_issues'] == 1
+    
+    def test_features_split_on_non_ascii_separators(self, model):
+        """Test that non-ASCII punctuation and spaces separate tokens"""
+        features = model.extract_features('if\xa0x: FOO\u2014BAR')
+        assert features[0][1] == 1  # if
+        assert features[0][5] == 2  # FOO, BAR
+    
+    def test_tokenizer_shared_with_features(self, model):
+        """Test that features and the vectorizer count the same tokens"""
+        code = 'if\xa0x: import os\u2014TODO'
+        tokens = tokenize(code)
+        
+        assert model.vectorizer.build_tokenizer()(code) == tokens
+        assert tokens == ['if', 'x', 'import', 'os', 'TODO']
+        features = model.extract_features(code)
+        assert features[0][1] == tokens.count('if')
+        assert features[0][6] == tokens.count('import')
+        assert features[0][9] == tokens.count('TODO')
+    
     def test_severity_calculation(self, model):
         """Test severity breakdown calculation"""
         bugs = [
@@ -157,60 +205,81 @@ def complex_function():
         assert severity['medium'] == 1
         assert severity['low'] == 1
     
-    def test_multiple_issues_same_line(self, model):
+    def test_pattern_hits_sequence(self, model):
+        """Test that pattern hits behave like a list of bug dicts"""
+        hits = model.predict_bytes(b'x = 1\nresult = eval(data)  # TODO')['bugs_found']
+        
+        assert isinstance(hits, PatternHits)
+        assert len(hits) == 2
+        assert hits.line_nos == [2, 2]
+        assert hits[0]['message'].startswith('Use of eval()')
+        assert hits[-1]['severity'] == 'medium'
+        assert hits[-1]['code'] == 'result = eval(data)  # TODO'
+        assert [b['line'] for b in hits] == [2, 2]
+        assert model._calculate_severity(hits) == model._calculate_severity(list(hits))
+    
+    def test_predict_returns_plain_list(self, model):
+        """Test that predict results are lists and serialize to JSON"""
+        for code in (_CODE_EVAL, _CODE_SMALL_CLEAN):
+            results = model.predict(code)
+            assert isinstance(results['bugs_found'], list)
+            assert json.loads(json.dumps(results)) == results
+        assert isinstance(model.detect_pattern_bugs(_CODE_EVAL), list)
+    
+    def test_multiple_issues_same_line(self, predict):
         """Test detection of multiple issues on same line"""
         code = 'password = "test123"; api_key = "sk-abc"'
         
-        results = model.predict(code)
+        results = predict(code)
         assert results['total_issues'] >= 2
     
-    def test_console_log_detection(self, model):
-        """Test detection of console.log statements"""
-        code = '''
-function debug() {
-    console.log("Debug info");
-    return true;
-}
-        '''
-        
-        results = model.predict(code)
-        bugs = results['bugs_found']
-        console_bugs = [b for b in bugs if 'console' in b['message'].lower()]
-        assert len(console_bugs) > 0
-        assert console_bugs[0]['severity'] == 'low'
-    
-    def test_todo_comment_detection(self, model):
-        """Test detection of TODO comments"""
-        code = '''
-def incomplete():
-    # TODO: implement this
-    pass
-        '''
+    def test_overlapping_patterns_same_line(self, predict):
+        """Test that a match doesn't hide another pattern inside it"""
+        code = 'var password = "secret";'
         
-        results = model.predict(code)
-        bugs = results['bugs_found']
-        todo_bugs = [b for b in bugs if 'todo' in b['message'].lower()]
-        assert len(todo_bugs) > 0
+        results = predict(code)
+        messages = [b['message'].lower() for b in results['bugs_found']]
+        assert any('var' in m for m in messages)
+        assert any('password' in m for m in messages)
 
 class TestModelPersistence:
     """Test model saving and loading"""
     
-    def test_save_and_load_model(self, tmp_path):
+    def test_save_and_load_model(self, model):
         """Test model can be saved and loaded"""
-        model = BugDetectionModel()
+        # Round-trip through memory
+        buf = io.BytesIO()
+        model.save_model(buf)
+        
+        assert buf.tell() > 0
+        
+        # Load model
+        buf.seek(0)
+        new_model = BugDetectionModel()
+        new_model.load_model(buf)
         
-        # Save model
+        assert new_model.model is not None
+        assert new_model.vectorizer is not None
+    
+    def test_save_and_load_model_file(self, model, tmp_path):
+        """Test model can be saved to and loaded from a file path, as train.py does"""
         model_path = tmp_path / "test_model.pkl"
         model.save_model(str(model_path))
         
         assert model_path.exists()
         
-        # Load model
         new_model = BugDetectionModel()
         new_model.load_model(str(model_path))
         
         assert new_model.model is not None
         assert new_model.vectorizer is not None
+    
+    def test_pickle_has_no_project_references(self, model):
+        """Test that models saved via 'model' load via 'ml_engine.model'"""
+        buf = io.BytesIO()
+        model.save_model(buf)
+        
+        assert b'ml_engine' not in buf.getvalue()
 
 @pytest.mark.parametrize("code,expected_bugs", [
     ('if x == None: pass', True),
@@ -218,11 +287,89 @@ class TestModelPersistence:
     ('var x = 10;', True),
     ('const x = 10;', False),
 ])
-def test_parametrized_detection(code, expected_bugs):
+def test_parametrized_detection(predict, code, expected_bugs):
     """Parametrized tests for various code patterns"""
-    model = BugDetectionModel()
-    results = model.predict(code)
+    results = predict(code)
     
     if expected_bugs:
         assert results['has_bugs'] == True or results['total_issues'] > 0
     # Note: Clean code might still trigger low-confidence issues
+
+@pytest.mark.parametrize("code,keyword,severity", [
+    (_CODE_PASSWORD, 'password', 'critical'),
+    (_CODE_BARE_EXCEPT, 'except', 'high'),
+    (_CODE_EVAL, 'eval', 'critical'),
+    (_CODE_API_KEY, 'api', 'critical'),
+    (_CODE_CONSOLE_LOG, 'console', 'low'),
+    (_CODE_TODO, 'todo', 'medium'),
+], ids=['password', 'bare_except', 'eval', 'api_key', 'console_log', 'todo'])
+def test_single_pattern_detection(predict, code, keyword, severity):
+    """Test that each snippet triggers its pattern with the right severity"""
+    results = predict(code)
+    assert results['has_bugs'] == True
+    assert results['total_issues'] > 0
+    
+    matching = [b for b in results['bugs_found'] if keyword in b['message'].lower()]
+    assert len(matching) > 0
+    assert matching[0]['severity'] == severity
+
+def _line_hits(model, code):
+    """(line, severity) of every str regex hit, checked line by line"""
+    return [
+        (line_no, severity)
+        for line_no, line in enumerate(code.split('\n'), 1)
+        for regex, severity, _ in model._compiled_patterns
+        if regex.search(line)
+    ]
+
+@pytest.mark.parametrize("compile_fused", [
+    model_module._compile_re,
+    pytest.param(
+        model_module._compile_re2,
+        marks=pytest.mark.skipif(model_module.re2 is None, reason="google-re2 not installed")
+    ),
+], ids=['re', 're2'])
+@pytest.mark.parametrize("code", [
+    'password\x1f= "x"',
+    'eval\x0b(x)',
+    'var\x0bx = 1',
+    'VAR x=',
+    'x ==\tNone\nexcept :',
+    'x = 1\nresult = eval(data)  # TODO',
+])
+def test_fused_engines(model, monkeypatch, compile_fused, code):
+    """Test that every fused byte regex engine finds the same hits as str regexes"""
+    monkeypatch.setattr(model_module, '_compile_fused', compile_fused)
+    monkeypatch.setattr(BugDetectionModel, '_fused_cache', {})
+    
+    assert code.isascii()  # Only ASCII input reaches the byte engines
+    expected = _line_hits(model, code)
+    assert expected
+    bugs = model.detect_pattern_bugs(code)
+    assert [(b['line'], b['severity']) for b in bugs] == expected
+
+@pytest.mark.parametrize("code", [
+    'var 变量 = 1',
+    'password\u3000= "x"',
+    'VAR é=',
+    'paſſword = "x"',
+    'HAC\u212a',
+])
+def test_fused_text_scan(model, code):
+    """Test that the str scan of non-ASCII code finds the same hits as str regexes"""
+    expected = _line_hits(model, code)
+    assert expected
+    bugs = model.detect_pattern_bugs(code)
+    assert [(b['line'], b['severity']) for b in bugs] == expected
+    assert model.predict_bytes(code.encode('utf-8'))['bugs_found'] == bugs
+
+@pytest.mark.parametrize("run", ['é', '变', '\xa0', ' é'], ids=['latin', 'cjk', 'nbsp', 'mixed'])
+def test_long_non_ascii_runs_skip_byte_scan(model, monkeypatch, run):
+    """Test that long non-ASCII runs are scanned as str, not by the byte patterns"""
+    def byte_scan(self, data):
+        raise AssertionError("non-ASCII input reached the byte scan")
+    monkeypatch.setattr(BugDetectionModel, '_scan_ascii', byte_scan)
+    code = 'var ' + run * 400
+    
+    assert model.detect_pattern_bugs(code) == []
+    assert model.predict_bytes(code.encode('utf-8'))['total_issues'] == 0
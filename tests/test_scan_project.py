@@ -0,0 +1,95 @@
+"""
+Tests for the project scanning script
+"""
+
+import pytest
+import random
+import sys
+import os
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import scan_project
+from ml_engine.model import BugDetectionModel
+
+# Fragments that exercise every pattern, non-ASCII word and space characters,
+# Unicode case folding ('ſ' is 's', 'K' is 'k') and \s runs that cross a newline
+_FRAGMENTS = [
+    'var', 'password', 'api_key', 'eval', 'exec', 'TODO', 'hack', 'None',
+    'except', 'console.log(', '.innerHTML', 'x', '(', '=', '==', ':', '"', "'",
+    'paſſword', 'api_\u212aey', 'conſole.log(', 'HAC\u212a', 'ſ', '\u212a',
+    ' ', '\t', '\n', '\x0b', '\x1c', '\x1f', '\xa0', '　', 'é', '变量',
+]
+
+def _corpus():
+    # ASCII-only snippets take the byte scan, the rest the str scan
+    rnd = random.Random(42)
+    ascii_fragments = [f for f in _FRAGMENTS if f.isascii()]
+    return [
+        ''.join(rnd.choice(fragments) for _ in range(rnd.randint(0, 12)))
+        for fragments in (_FRAGMENTS, ascii_fragments)
+        for _ in range(500)
+    ]
+
+def _line_by_line(model, code):
+    """Bugs found by running each str regex over each line"""
+    return [
+        {
+            'line': line_no,
+            'severity': severity,
+            'message': message,
+            'code': line.strip(),
+            'type': 'pattern'
+        }
+        for line_no, line in enumerate(code.split('\n'), 1)
+        for regex, severity, message in model._compiled_patterns
+        if regex.search(line)
+    ]
+
+@pytest.fixture(scope="module")
+def reference():
+    """Plain regex model every scanner variant must agree with"""
+    return BugDetectionModel()
+
+@pytest.mark.parametrize("model_class", [
+    'BugDetectionModel',
+    pytest.param(
+        'HyperscanBugDetectionModel',
+        marks=pytest.mark.skipif(scan_project.hyperscan is None, reason="hyperscan not installed")
+    ),
+    pytest.param(
+        'AhoCorasickBugDetectionModel',
+        marks=pytest.mark.skipif(not scan_project.JIT_AVAILABLE, reason="numba not installed")
+    ),
+])
+def test_scanner_matches_reference(reference, model_class):
+    """Test that each create_model() variant reports the same bugs"""
+    model = getattr(scan_project, model_class)()
+
+    for code in _corpus():
+        data = code.encode('utf-8')
+        results = model.predict_bytes(data)
+        assert results['bugs_found'] == _line_by_line(reference, code), repr(code)
+        assert results == reference.predict_bytes(data), repr(code)
+
+@pytest.mark.skipif(scan_project.hyperscan is None, reason="hyperscan not installed")
+def test_create_model_prefers_hyperscan():
+    """Test that create_model() picks Hyperscan when it is installed"""
+    assert isinstance(scan_project.create_model(), scan_project.HyperscanBugDetectionModel)
+
+def test_scan_skips_unreadable_files(tmp_path, monkeypatch, capsys):
+    """Test that a dangling symlink is reported and the scan still completes"""
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "a.py").write_text('result = eval(data)\n')
+    (project / "b.py").symlink_to(tmp_path / "missing.py")
+    monkeypatch.chdir(tmp_path)
+
+    results = scan_project.scan_project(str(project))
+
+    assert results['total_files'] == 1
+    assert results['total_issues'] == 1
+    assert "Skipping " in capsys.readouterr().out
+    assert (tmp_path / "scan_results.json").exists()
+    assert (tmp_path / "scan_report.html").exists()
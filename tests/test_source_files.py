@@ -0,0 +1,91 @@
+"""
+Tests for the source file helpers
+"""
+
+import pytest
+import sys
+import os
+
+# Add scripts to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import source_files
+from source_files import find_code_files, read_source
+
+def test_find_code_files(tmp_path):
+    """Test that excluded directories are pruned by exact name only"""
+    files = [
+        'main.py',
+        'distance.py',
+        'app.js',
+        'notes.txt',
+        'src/venv_utils.py',
+        'src/deep/util.js',
+        '.github/workflows/check.py',
+        'node_modules/lib/index.js',
+        'venv/lib/site.py',
+        '.venv/lib/site.py',
+        '.git/hooks/pre-commit.py',
+        'dist/bundle.js',
+        'src/dist/bundle.js',
+    ]
+    for name in files:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text('')
+
+    found = find_code_files(tmp_path, ('.py', '.js'))
+
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in found) == [
+        '.github/workflows/check.py',
+        'app.js',
+        'distance.py',
+        'main.py',
+        'src/deep/util.js',
+        'src/venv_utils.py',
+    ]
+
+def test_find_code_files_extension_filter(tmp_path):
+    """Test that only the requested extensions are returned"""
+    for name in ('a.py', 'b.js', 'c.ts', 'd.pyc', 'e.py.bak'):
+        (tmp_path / name).write_text('')
+
+    found = find_code_files(tmp_path, ['.py', '.ts'])
+
+    assert sorted(p.name for p in found) == ['a.py', 'c.ts']
+
+def test_read_source_round_trip(tmp_path):
+    """Test that a normal file is returned byte for byte"""
+    data = 'x = "caf\xe9"\r\n# note\n'.encode('utf-8') * 1000
+    path = tmp_path / 'a.py'
+    path.write_bytes(data)
+
+    assert read_source(path) == data
+
+def test_read_source_rejects_oversized_files(tmp_path, monkeypatch):
+    """Test that files over MAX_FILE_BYTES raise ValueError"""
+    monkeypatch.setattr(source_files, 'MAX_FILE_BYTES', 100)
+    path = tmp_path / 'bundle.js'
+    path.write_bytes(b'x' * 100)
+    assert read_source(path) == b'x' * 100
+
+    path.write_bytes(b'x' * 101)
+    with pytest.raises(ValueError, match='over the 100 byte limit'):
+        read_source(path)
+
+@pytest.mark.parametrize("offset", [0, source_files.SNIFF_BYTES - 1])
+def test_read_source_rejects_binary_files(tmp_path, offset):
+    """Test that a NUL byte in the first SNIFF_BYTES marks the file binary"""
+    path = tmp_path / 'blob.py'
+    path.write_bytes(b'x' * offset + b'\0' + b'x' * 10)
+
+    with pytest.raises(ValueError, match='binary'):
+        read_source(path)
+
+def test_read_source_sniffs_only_the_prefix(tmp_path):
+    """Test that a NUL byte past SNIFF_BYTES doesn't reject the file"""
+    data = b'x' * source_files.SNIFF_BYTES + b'\0'
+    path = tmp_path / 'late.py'
+    path.write_bytes(data)
+
+    assert read_source(path) == data